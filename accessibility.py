@@ -0,0 +1,220 @@
+"""Accessibility-API lookup of common UI controls, used to skip vision-model calls."""
+import os
+import sys
+
+
+# Normalized description -> (button names, macOS AX subroles)
+A11Y_TARGETS = {
+    "close button": (("Close",), ("AXCloseButton",)),
+    "close": (("Close",), ("AXCloseButton",)),
+    "minimize button": (("Minimize", "Minimise"), ("AXMinimizeButton",)),
+    "maximize button": (("Maximize", "Maximise", "Zoom"), ("AXZoomButton", "AXFullScreenButton")),
+    "ok button": (("OK", "Ok"), ()),
+    "ok": (("OK", "Ok"), ()),
+    "cancel button": (("Cancel",), ()),
+    "cancel": (("Cancel",), ()),
+    "yes button": (("Yes",), ()),
+    "no button": (("No",), ()),
+    "apply button": (("Apply",), ()),
+    "back button": (("Back",), ()),
+    "back": (("Back",), ()),
+    "forward button": (("Forward",), ()),
+    "reload button": (("Reload", "Refresh"), ()),
+}
+
+# Maximum depth searched below the foreground window
+SEARCH_DEPTH = 12
+
+# Platform resolver, chosen on first use (False when no backend is installed)
+_resolver = None
+
+# IDs of this process and its ancestors, found on first use. Their windows are
+# never searched: the foreground window is usually the terminal the agent runs
+# in, and "close button" must not resolve to that terminal's own Close.
+_own_pids = None
+
+
+def resolve(element_description):
+    """Find a common control in the foreground window via the accessibility API.
+
+    Args:
+        element_description: Natural language description (e.g., "close button")
+
+    Returns:
+        Tuple of (x, y) screen coordinates of the control center, or None if the
+        description is not a known control, no backend is available, or the
+        control was not found
+    """
+    target = A11Y_TARGETS.get(element_description.lower().strip())
+    if target is None:
+        return None
+
+    resolver = _get_resolver()
+    if not resolver:
+        return None
+
+    names, subroles = target
+    try:
+        return resolver(names, subroles)
+    except Exception as e:
+        print(f"Accessibility lookup failed: {e}")
+        return None
+
+
+def _get_own_pids():
+    """Return the IDs of this process and its ancestors."""
+    global _own_pids
+    if _own_pids is None:
+        pids = {os.getpid()}
+        try:
+            import psutil
+            pids.update(parent.pid for parent in psutil.Process().parents())
+        except ImportError:
+            # Walk /proc where it exists; elsewhere only the direct parent is known
+            pid = os.getppid()
+            while pid > 1 and pid not in pids:
+                pids.add(pid)
+                pid = _parent_pid(pid)
+        _own_pids = pids
+    return _own_pids
+
+
+def _parent_pid(pid):
+    """Parent process ID read from /proc, or 0 if unavailable."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesized command name: state, ppid, ...
+            return int(f.read().rsplit(")", 1)[1].split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _get_resolver():
+    """Pick the accessibility backend for this platform, importing it once."""
+    global _resolver
+    if _resolver is None:
+        try:
+            if sys.platform == "win32":
+                import uiautomation  # noqa: F401
+                _resolver = _resolve_windows
+            elif sys.platform == "darwin":
+                import ApplicationServices  # noqa: F401
+                _resolver = _resolve_macos
+            else:
+                import pyatspi  # noqa: F401
+                _resolver = _resolve_linux
+        except ImportError:
+            _resolver = False
+    return _resolver
+
+
+def _resolve_windows(names, subroles):
+    """Find a button in the foreground window with UI Automation."""
+    import ctypes
+    import uiautomation as auto
+
+    window = auto.GetForegroundControl()
+    if window is None:
+        return None
+    if (window.NativeWindowHandle == ctypes.windll.kernel32.GetConsoleWindow()
+            or window.ProcessId in _get_own_pids()):
+        return None
+    for name in names:
+        button = window.ButtonControl(searchDepth=SEARCH_DEPTH, Name=name)
+        if button.Exists(0, 0):
+            rect = button.BoundingRectangle
+            return rect.xcenter(), rect.ycenter()
+    return None
+
+
+def _resolve_linux(names, subroles):
+    """Find a push button in the active window with AT-SPI."""
+    import pyatspi
+
+    def is_target(node):
+        return node.getRole() == pyatspi.ROLE_PUSH_BUTTON and node.name in names
+
+    def find_button(window):
+        stack = [(window, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if node is None:
+                continue
+            if is_target(node):
+                return node
+            if depth < SEARCH_DEPTH:
+                stack.extend((child, depth + 1) for child in node)
+        return None
+
+    own_pids = _get_own_pids()
+    desktop = pyatspi.Registry.getDesktop(0)
+    for app in desktop:
+        if app is None or app.get_process_id() in own_pids:
+            continue
+        for window in app:
+            if window is None or not window.getState().contains(pyatspi.STATE_ACTIVE):
+                continue
+            button = find_button(window)
+            if button is not None:
+                ext = button.queryComponent().getExtents(pyatspi.DESKTOP_COORDS)
+                return ext.x + ext.width // 2, ext.y + ext.height // 2
+    return None
+
+
+def _resolve_macos(names, subroles):
+    """Find a button in the focused window with the macOS AX API."""
+    from ApplicationServices import (
+        AXUIElementCreateSystemWide,
+        AXUIElementCopyAttributeValue,
+        AXUIElementGetPid,
+        AXValueGetValue,
+        kAXChildrenAttribute,
+        kAXDescriptionAttribute,
+        kAXFocusedApplicationAttribute,
+        kAXFocusedWindowAttribute,
+        kAXPositionAttribute,
+        kAXRoleAttribute,
+        kAXSizeAttribute,
+        kAXSubroleAttribute,
+        kAXTitleAttribute,
+        kAXValueCGPointType,
+        kAXValueCGSizeType,
+    )
+
+    def attribute(element, name):
+        err, value = AXUIElementCopyAttributeValue(element, name, None)
+        return value if err == 0 else None
+
+    def is_target(element):
+        if attribute(element, kAXRoleAttribute) != "AXButton":
+            return False
+        if attribute(element, kAXSubroleAttribute) in subroles:
+            return True
+        return (attribute(element, kAXTitleAttribute) in names
+                or attribute(element, kAXDescriptionAttribute) in names)
+
+    app = attribute(AXUIElementCreateSystemWide(), kAXFocusedApplicationAttribute)
+    if app is None:
+        return None
+    err, pid = AXUIElementGetPid(app, None)
+    if err == 0 and pid in _get_own_pids():
+        return None
+    window = attribute(app, kAXFocusedWindowAttribute)
+    if window is None:
+        return None
+
+    stack = [(window, 0)]
+    while stack:
+        element, depth = stack.pop()
+        if is_target(element):
+            _, position = AXValueGetValue(
+                attribute(element, kAXPositionAttribute), kAXValueCGPointType, None
+            )
+            _, size = AXValueGetValue(
+                attribute(element, kAXSizeAttribute), kAXValueCGSizeType, None
+            )
+            return (int(position.x + size.width / 2), int(position.y + size.height / 2))
+        if depth < SEARCH_DEPTH:
+            for child in attribute(element, kAXChildrenAttribute) or ():
+                stack.append((child, depth + 1))
+    return None
@@ -3,25 +3,76 @@ from screenshot_capture import ScreenCapture
 from vision_analyzer import VisionAnalyzer
 from computer_control import ComputerControl
 from element_detector import ElementDetector
+from frame_pipeline import FramePipeline
+from base64_codec import BACKEND as BASE64_BACKEND
+import asyncio
+import concurrent.futures
+from collections import deque
+import threading
 import time
 
 
 class ComputerUseAgent:
     """Agent that can see the screen and control the computer."""
     
-    def __init__(self, api_key, save_screenshots=True, use_element_detection=True):
+    def __init__(self, api_key, save_screenshots=True, use_element_detection=True,
+                 save_post_screenshots=True, image_format="JPEG", history_frames=0,
+                 post_action_delay=0.3):
         """Initialize the computer use agent.
         
         Args:
             api_key: OpenAI API key
             save_screenshots: Whether to save screenshots to disk
             use_element_detection: Enable smart element detection
+            save_post_screenshots: Capture a screenshot after every action (taken
+                in the background so the next action is not delayed)
+            image_format: Encoding for screenshots sent to the model ("JPEG", "WEBP" or "PNG")
+            history_frames: Number of earlier screens observe_and_act sends along with
+                the current one, in the same request, so the model sees recent changes
+            post_action_delay: Seconds to let the screen settle after an action before
+                it is captured again (post-action screenshot or next observation)
         """
         print("Initializing Computer Use Agent...")
-        self.screen_capture = ScreenCapture(save_screenshots=save_screenshots)
-        self.vision_analyzer = VisionAnalyzer(api_key=api_key)
+        self.screen_capture = ScreenCapture(
+            save_screenshots=save_screenshots, image_format=image_format
+        )
+        self.vision_analyzer = VisionAnalyzer(
+            api_key=api_key, image_mime_type=self.screen_capture.mime_type
+        )
         self.computer_control = ComputerControl(failsafe=True)
         self.action_count = 0
+        print(f"Base64 encoder: {BASE64_BACKEND}")
+        
+        # Capture buffer reused by smart_click for template matching
+        self._match_frame = None
+        
+        # Allocation-free capture/encode loop used by monitor
+        self._pipeline = FramePipeline(self.screen_capture)
+        
+        # Most recent (screenshot, base64 image, capture time) for reuse
+        self._frame_cache = (None, None, 0.0)
+        self._frame_lock = threading.Lock()
+        
+        # Screens seen by observe_and_act, oldest first
+        self._recent_frames = deque(maxlen=history_frames)
+        
+        # Post-action screenshots are captured off the critical path
+        self.save_post_screenshots = save_post_screenshots
+        self.post_action_delay = post_action_delay
+        self._settled_at = 0.0
+        self._post_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        
+        # Interactive command verb -> handler taking the rest of the line
+        self._dispatch = {
+            "observe": self._cmd_observe,
+            "goal": self._cmd_goal,
+            "smart_click": self._cmd_smart_click,
+            "list_elements": self._cmd_list_elements,
+            "click": self._cmd_click,
+            "type": self._cmd_type,
+            "scroll": self._cmd_scroll,
+            "wait": self._cmd_wait,
+        }
         
         # Initialize element detector if enabled
         self.use_element_detection = use_element_detection
@@ -31,6 +82,81 @@ class ComputerUseAgent:
         
         print("Agent initialized successfully!")
     
+    def _get_frame(self, max_age=0.25):
+        """Return the current screen, reusing the last capture if it is recent.
+        
+        Args:
+            max_age: Maximum age in seconds of a cached capture
+            
+        Returns:
+            Tuple of (PIL Image, base64 encoded image)
+        """
+        screenshot, base64_image, captured_at = self._frame_cache
+        if screenshot is not None and time.monotonic() - captured_at < max_age:
+            return screenshot, base64_image
+        
+        self._wait_for_settle()
+        captured_at = time.monotonic()
+        screenshot, base64_image = self.screen_capture.capture_and_encode()
+        
+        with self._frame_lock:
+            if captured_at >= self._frame_cache[2]:
+                self._frame_cache = (screenshot, base64_image, captured_at)
+        return screenshot, base64_image
+    
+    def _invalidate_frame(self):
+        """Drop the cached capture (the screen is about to change)."""
+        with self._frame_lock:
+            self._frame_cache = (None, None, time.monotonic())
+    
+    def _wait_for_settle(self):
+        """Sleep until post_action_delay has passed since the last action."""
+        remaining = self._settled_at - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    def _take_post_action_screenshot(self):
+        """Queue a post-action screenshot in the background.
+        
+        The capture only feeds the on-disk audit trail, so it is skipped when
+        screenshots are not being saved.
+        
+        Returns:
+            Future for the capture, or None if post-action screenshots are disabled
+        """
+        self._settled_at = time.monotonic() + self.post_action_delay
+        self._invalidate_frame()
+        if not (self.save_post_screenshots and self.screen_capture.save_screenshots):
+            return None
+        print("\nTaking post-action screenshot...")
+        return self._post_executor.submit(
+            self._capture_post_action,
+            f"action_{self.action_count:03d}_after{self.screen_capture.disk_extension}"
+        )
+    
+    def _capture_post_action(self, filename):
+        """Capture the screen after an action for the audit trail.
+        
+        The capture is not used as the cached frame: it may be taken while the
+        application is still redrawing, and observe() must see the result.
+        """
+        self._wait_for_settle()
+        self.screen_capture.take_screenshot(filename=filename)
+    
+    def _run_async(self, coro):
+        """Run a coroutine on a fresh event loop, closing the async client with it."""
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.vision_analyzer.aclose()
+        return asyncio.run(run())
+    
+    @staticmethod
+    def _print_token(token):
+        """Print a streamed response fragment immediately."""
+        print(token, end='', flush=True)
+    
     def observe(self):
         """Take a screenshot and analyze it.
         
@@ -40,19 +166,17 @@ class ComputerUseAgent:
         print(f"\n{'='*60}")
         print(f"Action #{self.action_count + 1} - Taking screenshot...")
         
-        # Take screenshot
-        screenshot = self.screen_capture.take_screenshot()
+        # Take screenshot (or reuse a fresh one) and encode to base64
+        screenshot, base64_image = self._get_frame()
         
-        # Encode to base64
-        base64_image = self.screen_capture.encode_image_to_base64(screenshot)
-        
-        # Analyze with vision model
+        # Analyze with vision model, printing the analysis as it streams in
         print("Analyzing screenshot with GPT-5 mini...")
-        analysis = self.vision_analyzer.analyze_screenshot(base64_image)
-        
         print("\nScreen Analysis:")
         print("-" * 60)
-        print(analysis)
+        analysis = self.vision_analyzer.analyze_screenshot(
+            base64_image, on_token=self._print_token
+        )
+        print()
         print("-" * 60)
         
         return screenshot, base64_image, analysis
@@ -69,25 +193,77 @@ class ComputerUseAgent:
         print(f"\n{'='*60}")
         print(f"Action #{self.action_count + 1} - Observing for goal: {goal}")
         
-        # Take screenshot
-        screenshot = self.screen_capture.take_screenshot()
-        
-        # Encode to base64
-        base64_image = self.screen_capture.encode_image_to_base64(screenshot)
+        # Take screenshot (or reuse a fresh one) and encode to base64
+        screenshot, base64_image = self._get_frame()
         
         # Analyze and get action suggestion
         print("Analyzing and planning next action...")
-        action_suggestion = self.vision_analyzer.analyze_and_suggest_action(
-            base64_image, goal
-        )
-        
         print("\nSuggested Action:")
         print("-" * 60)
-        print(action_suggestion)
+        action_suggestion = self.vision_analyzer.analyze_and_suggest_action(
+            base64_image, goal, on_token=self._print_token,
+            history=list(self._recent_frames)
+        )
+        print()
         print("-" * 60)
         
+        # An unchanged screen reuses the same encoding; keep only distinct frames
+        if not self._recent_frames or self._recent_frames[-1] is not base64_image:
+            self._recent_frames.append(base64_image)
+        
         return action_suggestion
     
+    def monitor(self, iterations, prompt=None, interval=0.0, max_in_flight=2):
+        """Capture and analyze the screen repeatedly.
+        
+        Args:
+            iterations: Number of screenshots to take
+            prompt: Custom prompt for each analysis (optional)
+            interval: Seconds to wait between captures
+            max_in_flight: Maximum number of analyses awaiting a response at once
+            
+        Returns:
+            List of analysis texts, one per screenshot, in capture order
+        """
+        return self._run_async(self.monitor_async(iterations, prompt, interval, max_in_flight))
+    
+    async def monitor_async(self, iterations, prompt=None, interval=0.0, max_in_flight=2):
+        """Async version of monitor that overlaps capture with analysis.
+        
+        Each screenshot is captured, downscaled and encoded by the frame
+        pipeline in a worker thread while the previous ones are still being
+        analyzed, so only the encoded image crosses into the event loop.
+        Captures wait while max_in_flight analyses are pending, which bounds
+        both requests and queued frames. Monitored frames are not saved to disk.
+        
+        Args:
+            iterations: Number of screenshots to take
+            prompt: Custom prompt for each analysis (optional)
+            interval: Seconds to wait between captures
+            max_in_flight: Maximum number of analyses awaiting a response at once
+            
+        Returns:
+            List of analysis texts, one per screenshot, in capture order
+        """
+        semaphore = asyncio.Semaphore(max_in_flight)
+        
+        async def analyze(encoded_image):
+            try:
+                return await self.vision_analyzer.analyze_screenshot_async(encoded_image, prompt)
+            finally:
+                semaphore.release()
+        
+        tasks = []
+        for index in range(iterations):
+            if index and interval:
+                await asyncio.sleep(interval)
+            await semaphore.acquire()
+            _, encoded_image = await asyncio.to_thread(self._pipeline.tick)
+            print(f"Captured frame {index + 1}/{iterations}, analyzing...")
+            tasks.append(asyncio.create_task(analyze(encoded_image)))
+        
+        return await asyncio.gather(*tasks)
+    
     def execute_action(self, action_type, **kwargs):
         """Execute a computer control action.
         
@@ -96,6 +272,7 @@ class ComputerUseAgent:
             **kwargs: Action-specific parameters
         """
         print(f"\nExecuting action: {action_type}")
+        self._invalidate_frame()
         
         if action_type == "click":
             self.computer_control.click(**kwargs)
@@ -121,10 +298,7 @@ class ComputerUseAgent:
         self.action_count += 1
         
         # Take screenshot after action
-        print("\nTaking post-action screenshot...")
-        self.screen_capture.take_screenshot(
-            filename=f"action_{self.action_count:03d}_after.png"
-        )
+        self._take_post_action_screenshot()
     
     def smart_click(self, element_description):
         """Intelligently locate and click an element by description.
@@ -142,24 +316,115 @@ class ComputerUseAgent:
             print("Element detection is disabled. Use execute_action with coordinates instead.")
             return False, None
         
-        # Take current screenshot
-        screenshot = self.screen_capture.take_screenshot()
-        base64_image = self.screen_capture.encode_image_to_base64(screenshot)
+        print(f"\n{'='*60}")
+        print(f"Smart click: {element_description}")
+        print('='*60)
         
-        # Use element detector to find and click
-        success, coords = self.element_detector.learn_and_click(
-            screenshot, base64_image, element_description
-        )
+        # Common controls resolve through the accessibility API without a capture
+        coords = self.element_detector.a11y_resolve(element_description)
         
-        if success:
-            self.action_count += 1
-            # Take screenshot after action
-            print("\nTaking post-action screenshot...")
-            self.screen_capture.take_screenshot(
-                filename=f"action_{self.action_count:03d}_after.png"
+        if not coords:
+            # Template matching works directly on the raw frame, captured into
+            # the same buffer each time (nothing keeps it past this call)
+            self._wait_for_settle()
+            captured_at = time.monotonic()
+            frame = self.screen_capture.take_screenshot_ndarray(out=self._match_frame)
+            self._match_frame = frame
+            self.element_detector.forget_frame()
+            
+            # The PIL image is only built when it is saved or the AI has to look
+            screenshot = None
+            if self.screen_capture.save_screenshots:
+                screenshot = self.screen_capture.ndarray_to_image(frame)
+                self.screen_capture.save_screenshot(screenshot)
+            coords = self.element_detector.find_element_on_screen(element_description, frame)
+        
+        if not coords:
+            if screenshot is None:
+                screenshot = self.screen_capture.ndarray_to_image(frame)
+            base64_image = self.screen_capture.encode_image_to_base64(frame)
+            with self._frame_lock:
+                if captured_at >= self._frame_cache[2]:
+                    self._frame_cache = (screenshot, base64_image, captured_at)
+            coords = self.element_detector.learn_element(
+                screenshot, base64_image, element_description
             )
         
-        return success, coords
+        if not coords:
+            print(f"✗ Could not locate '{element_description}'")
+            return False, None
+        
+        self.computer_control.click(coords[0], coords[1])
+        self.action_count += 1
+        # Take screenshot after action
+        self._take_post_action_screenshot()
+        
+        return True, coords
+    
+    def smart_click_many(self, element_descriptions, concurrent=False):
+        """Locate and click several elements, in order, from a single screenshot.
+        
+        Learned elements are found by template matching; all remaining elements
+        are located with one batched AI request instead of one request each.
+        
+        Args:
+            element_descriptions: List of natural language descriptions
+            concurrent: Locate each unknown element with its own AI request,
+                issued concurrently, instead of one batched request
+            
+        Returns:
+            List of (success: bool, coordinates: tuple or None), one per description
+        """
+        if concurrent:
+            return self._run_async(self.smart_click_many_async(element_descriptions))
+        
+        if not self.use_element_detection:
+            print("Element detection is disabled. Use execute_action with coordinates instead.")
+            return [(False, None) for _ in element_descriptions]
+        
+        screenshot, base64_image = self._get_frame()
+        located = self.element_detector.locate_many(
+            screenshot, base64_image, element_descriptions
+        )
+        return self._click_located(element_descriptions, located)
+    
+    async def smart_click_many_async(self, element_descriptions):
+        """Async version of smart_click_many using concurrent AI requests.
+        
+        Args:
+            element_descriptions: List of natural language descriptions
+            
+        Returns:
+            List of (success: bool, coordinates: tuple or None), one per description
+        """
+        if not self.use_element_detection:
+            print("Element detection is disabled. Use execute_action with coordinates instead.")
+            return [(False, None) for _ in element_descriptions]
+        
+        screenshot, base64_image = self._get_frame()
+        located = await self.element_detector.locate_many_async(
+            screenshot, base64_image, element_descriptions
+        )
+        return self._click_located(element_descriptions, located)
+    
+    def _click_located(self, element_descriptions, located):
+        """Click located elements in order and take one post-action screenshot."""
+        results = []
+        for description in element_descriptions:
+            coords = located.get(description)
+            if coords:
+                self.computer_control.click(coords[0], coords[1])
+                self.action_count += 1
+                results.append((True, coords))
+            else:
+                print(f"✗ Could not locate '{description}'")
+                results.append((False, None))
+        
+        if any(success for success, _ in results):
+            # Take screenshot after the click sequence
+            self._take_post_action_screenshot()
+        
+        return results
     
     def list_learned_elements(self):
         """List all elements the agent has learned to recognize.
@@ -171,6 +436,63 @@ class ComputerUseAgent:
             return []
         return self.element_detector.list_known_elements()
     
+    def _cmd_observe(self, rest):
+        """Handle "observe"."""
+        self.observe()
+    
+    def _cmd_goal(self, rest):
+        """Handle "goal <your goal>"."""
+        if rest:
+            self.observe_and_act(rest)
+        else:
+            print("Usage: goal <your goal>")
+    
+    def _cmd_smart_click(self, rest):
+        """Handle "smart_click <element>"."""
+        if rest:
+            self.smart_click(rest)
+        else:
+            print("Usage: smart_click <element>")
+    
+    def _cmd_list_elements(self, rest):
+        """Handle "list_elements"."""
+        elements = self.list_learned_elements()
+        if elements:
+            print("\nLearned elements:")
+            for elem in elements:
+                print(f"  - {elem}")
+        else:
+            print("No elements learned yet")
+    
+    def _cmd_click(self, rest):
+        """Handle "click <x> <y>"."""
+        parts = rest.split()
+        if len(parts) >= 2:
+            self.execute_action("click", x=int(parts[0]), y=int(parts[1]))
+        else:
+            print("Usage: click <x> <y>")
+    
+    def _cmd_type(self, rest):
+        """Handle "type <text>"."""
+        if rest:
+            self.execute_action("type", text=rest)
+        else:
+            print("Usage: type <text>")
+    
+    def _cmd_scroll(self, rest):
+        """Handle "scroll <amount>"."""
+        if rest:
+            self.execute_action("scroll", clicks=int(rest.split()[0]))
+        else:
+            print("Usage: scroll <amount>")
+    
+    def _cmd_wait(self, rest):
+        """Handle "wait <seconds>"."""
+        if rest:
+            self.execute_action("wait", seconds=float(rest.split()[0]))
+        else:
+            print("Usage: wait <seconds>")
+    
     def run_interactive(self):
         """Run the agent in interactive mode."""
         print("\n" + "="*60)
@@ -188,65 +510,35 @@ class ComputerUseAgent:
         print("  quit - Exit")
         print("\n" + "="*60)
         
-        while True:
-            try:
-                command = input("\nEnter command: ").strip()
-                
-                if not command:
-                    continue
-                
-                if command == "quit":
-                    print("Exiting agent...")
-                    break
-                
-                elif command == "observe":
-                    self.observe()
-                
-                elif command.startswith("goal "):
-                    goal = command[5:].strip()
-                    self.observe_and_act(goal)
-                
-                elif command.startswith("smart_click "):
-                    element = command[12:].strip()
-                    self.smart_click(element)
-                
-                elif command == "list_elements":
-                    elements = self.list_learned_elements()
-                    if elements:
-                        print("\nLearned elements:")
-                        for elem in elements:
-                            print(f"  - {elem}")
+        try:
+            while True:
+                try:
+                    command = input("\nEnter command: ").strip()
+                    
+                    if not command:
+                        continue
+                    
+                    if command == "quit":
+                        print("Exiting agent...")
+                        break
+                    
+                    verb, _, rest = command.partition(' ')
+                    handler = self._dispatch.get(verb)
+                    if handler:
+                        handler(rest.strip())
                     else:
-                        print("No elements learned yet")
+                        print(f"Unknown command: {command}")
                 
-                elif command.startswith("click "):
-                    parts = command.split()
-                    if len(parts) >= 3:
-                        x, y = int(parts[1]), int(parts[2])
-                        self.execute_action("click", x=x, y=y)
-                    else:
-                        print("Usage: click <x> <y>")
-                
-                elif command.startswith("type "):
-                    text = command[5:]
-                    self.execute_action("type", text=text)
-                
-                elif command.startswith("scroll "):
-                    amount = int(command.split()[1])
-                    self.execute_action("scroll", clicks=amount)
-                
-                elif command.startswith("wait "):
-                    seconds = float(command.split()[1])
-                    self.execute_action("wait", seconds=seconds)
-                
-                else:
-                    print(f"Unknown command: {command}")
-            
-            except KeyboardInterrupt:
-                print("\n\nInterrupted by user. Exiting...")
-                break
-            except Exception as e:
-                print(f"Error: {str(e)}")
+                except KeyboardInterrupt:
+                    print("\n\nInterrupted by user. Exiting...")
+                    break
+                except Exception as e:
+                    print(f"Error: {str(e)}")
+        finally:
+            # Let queued post-action screenshots finish writing
+            self._post_executor.shutdown(wait=True)
+            self.screen_capture.close()
+            self.vision_analyzer.close()
 
 
 if __name__ == "__main__":
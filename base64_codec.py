@@ -0,0 +1,26 @@
+"""Base64 encoding for images sent to the vision model."""
+import binascii
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+
+# SIMD base64 (pybase64) when installed, otherwise binascii's C encoder
+# called directly. Both read any contiguous buffer, so encoded images are
+# passed as memoryviews rather than copied out into bytes first.
+#
+# The choice is made once, here, so calls carry no dispatch. pybase64 does
+# the same for CPU features: its C extension probes the CPU when imported
+# and binds the fastest kernel it has (AVX-512 VBMI, AVX2, SSSE3, NEON, or
+# scalar), which get_version() reports.
+if pybase64 is not None:
+    b64encode = pybase64.b64encode_as_string
+    BACKEND = f"pybase64 {pybase64.get_version()}"
+else:
+    BACKEND = "binascii"
+    
+    def b64encode(data):
+        """Base64-encode a bytes-like object to an ASCII string."""
+        return binascii.b2a_base64(data, newline=False).decode('ascii')
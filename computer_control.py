@@ -6,19 +6,30 @@ import time
 class ComputerControl:
     """Handles keyboard and mouse control actions."""
     
-    def __init__(self, failsafe=True):
+    def __init__(self, failsafe=True, pause=0.0, min_action_interval=0.05):
         """Initialize computer control.
         
         Args:
             failsafe: Enable PyAutoGUI failsafe (move mouse to corner to abort)
+            pause: PyAutoGUI pause after every call (0.5 restores the old fixed delay)
+            min_action_interval: Minimum seconds between consecutive actions
         """
         pyautogui.FAILSAFE = failsafe
-        pyautogui.PAUSE = 0.5  # Pause between actions
+        pyautogui.PAUSE = pause
+        self.min_action_interval = min_action_interval
+        self._last_action_at = 0.0
         
         # Get screen size
         self.screen_width, self.screen_height = pyautogui.size()
         print(f"Screen size: {self.screen_width}x{self.screen_height}")
     
+    def _throttle(self):
+        """Sleep only as long as needed to keep actions min_action_interval apart."""
+        remaining = self._last_action_at + self.min_action_interval - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        self._last_action_at = time.monotonic()
+    
     def click(self, x=None, y=None, button='left', clicks=1, interval=0.0):
         """Click the mouse at specified position.
         
@@ -29,6 +40,7 @@ class ComputerControl:
             clicks: Number of clicks
             interval: Interval between clicks
         """
+        self._throttle()
         if x is not None and y is not None:
             print(f"Clicking at ({x}, {y})")
             pyautogui.click(x, y, clicks=clicks, interval=interval, button=button)
@@ -51,6 +63,7 @@ class ComputerControl:
             text: Text to type
             interval: Interval between keystrokes
         """
+        self._throttle()
         print(f"Typing: {text}")
         pyautogui.write(text, interval=interval)
     
@@ -60,6 +73,7 @@ class ComputerControl:
         Args:
             key: Key name (e.g., 'enter', 'esc', 'tab', 'space')
         """
+        self._throttle()
         print(f"Pressing key: {key}")
         pyautogui.press(key)
     
@@ -69,6 +83,7 @@ class ComputerControl:
         Args:
             *keys: Keys to press together (e.g., 'ctrl', 'c')
         """
+        self._throttle()
         print(f"Pressing hotkey: {'+'.join(keys)}")
         pyautogui.hotkey(*keys)
     
@@ -91,6 +106,7 @@ class ComputerControl:
             x: X coordinate to scroll at (optional)
             y: Y coordinate to scroll at (optional)
         """
+        self._throttle()
         print(f"Scrolling {clicks} clicks")
         if x is not None and y is not None:
             pyautogui.scroll(clicks, x, y)
@@ -41,7 +41,7 @@ def demo_smart_click():
    - Clicks the element
    
 2. Next time you click the same element:
-   - Uses PyAutoGUI image recognition
+   - Uses OpenCV template matching
    - Finds the saved template on screen
    - Clicks instantly (much faster!)
     """)
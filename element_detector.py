@@ -1,14 +1,135 @@
 """Element detection and extraction module using vision AI and image recognition."""
 import pyautogui
 from PIL import Image
+import accessibility
+import cv2
+import numpy as np
 import os
+import re
 import json
-from datetime import datetime
+import time
+import pickle
+import asyncio
+import atexit
+import threading
+from collections import OrderedDict
+
+
+_SANITIZE_RE = re.compile(r'[^\w -]+')
+_COORD_RE = re.compile(
+    r'^\s*(LEFT|TOP|WIDTH|HEIGHT)\s*:[^\d\n]*(\d+(?:\.\d*)?)', re.IGNORECASE | re.MULTILINE
+)
+
+_BOX_PROPERTIES = {
+    "left": {"type": "number", "description": "Percent from left edge (0-100)"},
+    "top": {"type": "number", "description": "Percent from top edge (0-100)"},
+    "width": {"type": "number", "description": "Percent of screen width (0-100)"},
+    "height": {"type": "number", "description": "Percent of screen height (0-100)"},
+    "confidence": {"type": "string", "enum": ["low", "medium", "high"]},
+}
+
+# Structured-output formats for element-location requests
+_ELEMENT_BOX_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "element_box",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": _BOX_PROPERTIES,
+            "required": list(_BOX_PROPERTIES),
+            "additionalProperties": False,
+        },
+    },
+}
+
+_ELEMENT_BOXES_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "element_boxes",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "elements": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"name": {"type": "string"}, **_BOX_PROPERTIES},
+                        "required": ["name", *_BOX_PROPERTIES],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["elements"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def _load_json_response(text):
+    """Parse a JSON model response, tolerating surrounding code fences."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1].rsplit("```", 1)[0]
+    return json.loads(text)
+
+
+def _to_bgr(image):
+    """Convert a PIL Image to an OpenCV BGR ndarray."""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+
+
+def _dhash64(image_bgr):
+    """Compute a 64-bit difference hash of a BGR ndarray.
+    
+    Args:
+        image_bgr: BGR (or grayscale) ndarray
+        
+    Returns:
+        Hash as a Python int
+    """
+    gray = image_bgr if image_bgr.ndim == 2 else cv2.cvtColor(image_bgr, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), 'big')
+
+
+def _phash(image, hash_size=16):
+    """Compute a perceptual hash of a PIL Image.
+    
+    Args:
+        image: PIL Image
+        hash_size: Side length of the DCT block kept for the hash
+        
+    Returns:
+        Hash as bytes (hash_size * hash_size bits)
+    """
+    gray = np.asarray(image.convert("L"), dtype=np.float32)
+    side = hash_size * 4
+    small = cv2.resize(gray, (side, side), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small)[:hash_size, :hash_size]
+    return np.packbits(low > np.median(low)).tobytes()
 
 
 class ElementDetector:
     """Detects, extracts, and locates UI elements on screen."""
     
+    AI_CACHE_SIZE = 64
+    CACHE_FLUSH_DELAY = 0.5
+    
+    # Multi-scale template matching
+    TEMPLATE_SCALES = (1.0, 0.9, 1.1, 0.75, 1.25)
+    PYRAMID_LEVELS = 3
+    MIN_TEMPLATE_SIDE = 12
+    EARLY_EXIT_SCORE = 0.95
+    
+    # dHash pre-check at an element's last known position
+    DHASH_MAX_DISTANCE = 12
+    LAST_POSITION_PAD = 8
+    
     def __init__(self, vision_analyzer, elements_dir="elements"):
         """Initialize element detector.
         
@@ -18,25 +139,78 @@ class ElementDetector:
         """
         self.vision_analyzer = vision_analyzer
         self.elements_dir = elements_dir
-        self.elements_cache_file = os.path.join(elements_dir, "elements_cache.json")
+        self.elements_cache_file = os.path.join(elements_dir, "elements_cache.pickle")
+        self.legacy_cache_file = os.path.join(elements_dir, "elements_cache.json")
         
         if not os.path.exists(elements_dir):
             os.makedirs(elements_dir)
         
+        # Cache writes are debounced; a pending write is flushed on exit
+        self._dirty = False
+        self._flush_timer = None
+        self._flush_lock = threading.Lock()
+        atexit.register(self._flush_cache_now)
+        
         # Load or create element cache
         self.elements_cache = self._load_cache()
+        
+        # Decoded element templates (BGR ndarrays) and their 64-bit dHashes
+        self._templates = {}
+        self._template_hashes = {}
+        
+        # Top-left corner where each element was last found this session
+        self._last_seen = {}
+        
+        # Gaussian pyramid of the most recent frame searched
+        self._pyramid_src = None
+        self._pyramid = None
+        
+        # Recent vision-model answers keyed by (screen phash, description)
+        self._ai_cache = OrderedDict()
+        
+        self._preload_templates()
     
     def _load_cache(self):
-        """Load element cache from disk."""
+        """Load element cache from disk, migrating a legacy JSON cache if present."""
         if os.path.exists(self.elements_cache_file):
-            with open(self.elements_cache_file, 'r') as f:
-                return json.load(f)
+            with open(self.elements_cache_file, 'rb') as f:
+                return pickle.load(f)
+        if os.path.exists(self.legacy_cache_file):
+            with open(self.legacy_cache_file, 'r') as f:
+                cache = json.load(f)
+            self._dirty = True
+            return cache
         return {}
     
     def _save_cache(self):
-        """Save element cache to disk."""
-        with open(self.elements_cache_file, 'w') as f:
-            json.dump(self.elements_cache, f, indent=2)
+        """Schedule the element cache to be written to disk.
+        
+        Repeated saves within CACHE_FLUSH_DELAY seconds are coalesced into a
+        single write.
+        """
+        with self._flush_lock:
+            self._dirty = True
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(self.CACHE_FLUSH_DELAY, self._flush_cache_now)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _flush_cache_now(self):
+        """Write the element cache to disk if it has unsaved changes."""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            
+            snapshot = dict(self.elements_cache)
+            tmp_file = self.elements_cache_file + ".tmp"
+            with open(tmp_file, 'wb', buffering=64 * 1024) as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.elements_cache_file)
+            self._dirty = False
     
     def extract_element_from_description(self, screenshot, base64_image, element_description):
         """Use AI to locate and extract a UI element.
@@ -52,48 +226,181 @@ class ElementDetector:
         screen_width, screen_height = screenshot.size
         
         # Ask AI to estimate element location
-        prompt = f"""Find the "{element_description}" on this screen.
+        prompt = self._element_prompt(element_description, screen_width, screen_height)
+        response = self.vision_analyzer.analyze_screenshot(
+            base64_image, prompt, response_format=_ELEMENT_BOX_FORMAT
+        )
+        return self._finish_extraction(screenshot, response, (screen_width, screen_height))
+    
+    async def extract_element_from_description_async(self, screenshot, base64_image,
+                                                     element_description):
+        """Async version of extract_element_from_description.
+        
+        Args:
+            screenshot: PIL Image of the full screen
+            base64_image: Base64 encoded screenshot
+            element_description: Description of element to find
+            
+        Returns:
+            Tuple of (cropped PIL Image, coordinates dict) or (None, None) if not found
+        """
+        screen_width, screen_height = screenshot.size
+        prompt = self._element_prompt(element_description, screen_width, screen_height)
+        response = await self.vision_analyzer.analyze_screenshot_async(
+            base64_image, prompt, response_format=_ELEMENT_BOX_FORMAT
+        )
+        return self._finish_extraction(screenshot, response, (screen_width, screen_height))
+    
+    async def extract_many_async(self, screenshot, base64_image, element_descriptions,
+                                 max_concurrency=8):
+        """Locate and extract several UI elements with concurrent AI requests.
+        
+        Args:
+            screenshot: PIL Image of the full screen
+            base64_image: Base64 encoded screenshot
+            element_descriptions: List of element descriptions
+            max_concurrency: Maximum number of requests in flight
+            
+        Returns:
+            Dict mapping each found description to (cropped PIL Image, coordinates dict)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def extract(description):
+            async with semaphore:
+                return await self.extract_element_from_description_async(
+                    screenshot, base64_image, description
+                )
+        
+        extracted = await asyncio.gather(*[extract(d) for d in element_descriptions])
+        return {
+            description: (cropped, coords)
+            for description, (cropped, coords) in zip(element_descriptions, extracted)
+            if coords
+        }
+    
+    def _element_prompt(self, element_description, screen_width, screen_height):
+        """Build the prompt asking the model to locate one element."""
+        return f"""Find the "{element_description}" on this screen.
 
 Screen size: {screen_width}x{screen_height} pixels
 
-Provide the estimated location as percentages from top-left corner (0,0):
-- LEFT: percentage from left edge (0-100)
-- TOP: percentage from top edge (0-100)  
-- WIDTH: percentage of screen width (0-100)
-- HEIGHT: percentage of screen height (0-100)
-
-Format your response EXACTLY like this:
-ELEMENT: [name of the element]
-LEFT: [number]
-TOP: [number]
-WIDTH: [number]
-HEIGHT: [number]
-CONFIDENCE: [low/medium/high]
+Respond with a JSON object giving the estimated location as percentages from the
+top-left corner (0,0):
+{{"left": <percent from left edge>, "top": <percent from top edge>,
+ "width": <percent of screen width>, "height": <percent of screen height>,
+ "confidence": "low" | "medium" | "high"}}
 
 Be as precise as possible."""
+    
+    def _finish_extraction(self, screenshot, response, screen_size):
+        """Parse an element-location response and crop the element.
         
-        response = self.vision_analyzer.analyze_screenshot(base64_image, prompt)
+        Args:
+            screenshot: PIL Image of the full screen
+            response: Text response from AI
+            screen_size: (width, height) of the screenshot in pixels
+            
+        Returns:
+            Tuple of (cropped PIL Image, coordinates dict) or (None, None) if not found
+        """
+        screen_width, screen_height = screen_size
         print(f"\nAI Element Detection Response:")
         print("-" * 60)
         print(response)
         print("-" * 60)
         
-        # Parse the response
-        coords = self._parse_coordinates(response, screen_width, screen_height)
+        # Parse the response, falling back to text parsing for non-JSON replies
+        try:
+            coords = self._percent_to_pixels(
+                _load_json_response(response), screen_width, screen_height
+            )
+        except (ValueError, IndexError, KeyError, TypeError):
+            coords = self._parse_coordinates(response, screen_width, screen_height)
         
         if coords:
-            # Extract the region
-            cropped = screenshot.crop((
-                coords['left'],
-                coords['top'],
-                coords['left'] + coords['width'],
-                coords['top'] + coords['height']
-            ))
-            
-            return cropped, coords
+            return self._crop_element(screenshot, coords), coords
         
         return None, None
     
+    def extract_multiple(self, screenshot, base64_image, element_descriptions):
+        """Use a single AI request to locate and extract several UI elements.
+        
+        Args:
+            screenshot: PIL Image of the full screen
+            base64_image: Base64 encoded screenshot
+            element_descriptions: List of element descriptions
+            
+        Returns:
+            Dict mapping each found description to (cropped PIL Image, coordinates dict)
+        """
+        screen_width, screen_height = screenshot.size
+        element_list = "\n".join(f'- "{d}"' for d in element_descriptions)
+        
+        prompt = f"""Find each of these elements on this screen:
+{element_list}
+
+Screen size: {screen_width}x{screen_height} pixels
+
+For each element, estimate its location as percentages from the top-left corner (0,0):
+left and top (0-100), width and height (percentage of screen width/height).
+
+Respond with a JSON object {{"elements": [...]}} holding one entry per element, using the
+element text exactly as given for "name":
+{{"name": "...", "left": 0, "top": 0, "width": 0, "height": 0, "confidence": "low" | "medium" | "high"}}
+
+Omit elements you cannot find. Be as precise as possible."""
+        
+        response = self.vision_analyzer.analyze_screenshot(
+            base64_image, prompt, response_format=_ELEMENT_BOXES_FORMAT
+        )
+        print(f"\nAI Multi-Element Detection Response:")
+        print("-" * 60)
+        print(response)
+        print("-" * 60)
+        
+        try:
+            items = _load_json_response(response)
+            if isinstance(items, dict):
+                items = items['elements']
+            if not isinstance(items, list):
+                raise ValueError(f"expected a list of elements, got {type(items).__name__}")
+        except (ValueError, IndexError, KeyError) as e:
+            print(f"Error parsing multi-element response: {e}")
+            return {}
+        
+        wanted = {d.lower().strip(): d for d in element_descriptions}
+        results = {}
+        for item in items:
+            try:
+                description = wanted.get(str(item['name']).lower().strip())
+                if description is None:
+                    continue
+                coords = self._percent_to_pixels(item, screen_width, screen_height)
+            except (KeyError, TypeError, ValueError):
+                continue
+            results[description] = (self._crop_element(screenshot, coords), coords)
+        
+        return results
+    
+    def _percent_to_pixels(self, percentages, screen_width, screen_height):
+        """Convert a percentage box ('left', 'top', 'width', 'height') to pixels."""
+        return {
+            'left': int(float(percentages['left']) * screen_width / 100),
+            'top': int(float(percentages['top']) * screen_height / 100),
+            'width': int(float(percentages['width']) * screen_width / 100),
+            'height': int(float(percentages['height']) * screen_height / 100)
+        }
+    
+    def _crop_element(self, screenshot, coords):
+        """Crop the region described by a pixel coordinates dict."""
+        return screenshot.crop((
+            coords['left'],
+            coords['top'],
+            coords['left'] + coords['width'],
+            coords['top'] + coords['height']
+        ))
+    
     def _parse_coordinates(self, ai_response, screen_width, screen_height):
         """Parse AI response to extract coordinates.
         
@@ -106,57 +413,53 @@ Be as precise as possible."""
             Dict with pixel coordinates or None
         """
         try:
-            lines = ai_response.strip().split('\n')
-            coords = {}
-            
-            for line in lines:
-                line = line.strip()
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    key = key.strip().upper()
-                    value = value.strip()
-                    
-                    if key in ['LEFT', 'TOP', 'WIDTH', 'HEIGHT']:
-                        # Extract number from value
-                        import re
-                        numbers = re.findall(r'\d+\.?\d*', value)
-                        if numbers:
-                            coords[key.lower()] = float(numbers[0])
+            coords = {
+                m.group(1).lower(): float(m.group(2))
+                for m in _COORD_RE.finditer(ai_response)
+            }
             
             if all(k in coords for k in ['left', 'top', 'width', 'height']):
                 # Convert percentages to pixels
-                return {
-                    'left': int(coords['left'] * screen_width / 100),
-                    'top': int(coords['top'] * screen_height / 100),
-                    'width': int(coords['width'] * screen_width / 100),
-                    'height': int(coords['height'] * screen_height / 100)
-                }
+                return self._percent_to_pixels(coords, screen_width, screen_height)
         
         except Exception as e:
             print(f"Error parsing coordinates: {e}")
         
         return None
     
-    def save_element(self, element_name, cropped_image, coords):
+    def save_element(self, element_name, cropped_image, coords, timestamp=None):
         """Save an extracted element to disk.
         
         Args:
             element_name: Name/description of the element
             cropped_image: PIL Image of the element
             coords: Coordinates dict
+            timestamp: Timestamp string for the filename (defaults to now);
+                batch callers pass one shared value
             
         Returns:
-            Path to saved element image
+            Path to saved element image, or None if it could not be written
         """
         # Sanitize element name for filename
-        safe_name = "".join(c for c in element_name if c.isalnum() or c in (' ', '-', '_')).strip()
-        safe_name = safe_name.replace(' ', '_').lower()
+        safe_name = _SANITIZE_RE.sub('', element_name).strip().replace(' ', '_').lower()
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_name}_{timestamp}.png"
+        if timestamp is None:
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+        filename = f"{safe_name}_{timestamp}.jpg"
         filepath = os.path.join(self.elements_dir, filename)
         
-        cropped_image.save(filepath)
+        template = _to_bgr(cropped_image)
+        # imencode + tofile rather than imwrite, which silently fails on
+        # non-ASCII paths on Windows (element names may contain any letters)
+        ok, buf = cv2.imencode(".jpg", template, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+        try:
+            if not ok:
+                raise ValueError("JPEG encoding failed")
+            buf.tofile(filepath)
+        except (OSError, ValueError) as e:
+            print(f"✗ Could not save element '{element_name}' to {filepath}: {e}")
+            return None
+        self._add_template(element_name, template)
         
         # Update cache
         self.elements_cache[element_name] = {
@@ -170,11 +473,179 @@ Be as precise as possible."""
         print(f"✓ Saved element '{element_name}' to {filepath}")
         return filepath
     
-    def find_element_on_screen(self, element_name, confidence=0.8):
+    def _preload_templates(self):
+        """Decode every cached element image into memory, pruning missing files."""
+        missing = []
+        for element_name, element_info in self.elements_cache.items():
+            filepath = element_info['filepath']
+            template = None
+            if os.path.exists(filepath):
+                template = cv2.imdecode(np.fromfile(filepath, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if template is None:
+                missing.append(element_name)
+            else:
+                self._add_template(element_name, template)
+        
+        for element_name in missing:
+            print(f"Element image missing, removing '{element_name}' from cache")
+            del self.elements_cache[element_name]
+        if missing:
+            self._save_cache()
+    
+    def _add_template(self, element_name, template):
+        """Register a decoded template and its dHash under an element name."""
+        self._templates[element_name] = template
+        self._template_hashes[element_name] = _dhash64(template)
+    
+    def _get_template(self, element_name):
+        """Return the decoded template for a cached element.
+        
+        Args:
+            element_name: Name of the element
+            
+        Returns:
+            BGR ndarray, or None if the template image is missing
+        """
+        template = self._templates.get(element_name)
+        if template is None:
+            print(f"Element image not loaded: {self.elements_cache[element_name]['filepath']}")
+        return template
+    
+    def forget_frame(self):
+        """Drop state cached for the last searched frame.
+        
+        Call this after overwriting a frame buffer in place, since the cached
+        pyramid is keyed by the frame object rather than its contents.
+        """
+        self._pyramid_src = None
+        self._pyramid = None
+    
+    def _build_pyramid(self, frame):
+        """Return a Gaussian pyramid for a frame, reusing the last one if possible.
+        
+        Args:
+            frame: BGR ndarray of the screen
+            
+        Returns:
+            List of ndarrays, full resolution first
+        """
+        if self._pyramid_src is not frame:
+            pyramid = [frame]
+            for _ in range(self.PYRAMID_LEVELS):
+                pyramid.append(cv2.pyrDown(pyramid[-1]))
+            self._pyramid_src = frame
+            self._pyramid = pyramid
+        return self._pyramid
+    
+    def _match_multiscale(self, frame, template):
+        """Match a template against a frame across several scales.
+        
+        Each scale is first matched on the coarsest pyramid level that still
+        leaves the template MIN_TEMPLATE_SIDE pixels wide, then refined at full
+        resolution in a small window around the coarse hit. Only the 1.0 scale
+        of a template too small for that is matched over the full-resolution
+        frame; the other scales always start at least one level down.
+        
+        Args:
+            frame: BGR ndarray of the screen
+            template: BGR ndarray of the element
+            
+        Returns:
+            Tuple of (best score, (x, y) center or None)
+        """
+        pyramid = self._build_pyramid(frame)
+        frame_h, frame_w = frame.shape[:2]
+        th, tw = template.shape[:2]
+        best_score, best_center = -1.0, None
+        
+        for scale in self.TEMPLATE_SCALES:
+            w, h = int(round(tw * scale)), int(round(th * scale))
+            if w < 1 or h < 1 or w > frame_w or h > frame_h:
+                continue
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            scaled = template if scale == 1.0 else cv2.resize(
+                template, (w, h), interpolation=interpolation
+            )
+            
+            level = 0
+            while (level < self.PYRAMID_LEVELS
+                   and min(w, h) / 2 ** (level + 1) >= self.MIN_TEMPLATE_SIDE):
+                level += 1
+            if level == 0 and scale != 1.0 and min(w, h) >= 2:
+                level = 1
+            
+            if level == 0:
+                x0, y0, region = 0, 0, frame
+            else:
+                factor = 2 ** level
+                coarse = cv2.resize(
+                    template, (w // factor, h // factor), interpolation=cv2.INTER_AREA
+                )
+                result = cv2.matchTemplate(pyramid[level], coarse, cv2.TM_CCOEFF_NORMED)
+                _, _, _, loc = cv2.minMaxLoc(result)
+                pad = 2 * factor
+                x0 = max(loc[0] * factor - pad, 0)
+                y0 = max(loc[1] * factor - pad, 0)
+                region = frame[y0:min(y0 + h + 2 * pad, frame_h),
+                               x0:min(x0 + w + 2 * pad, frame_w)]
+                if region.shape[0] < h or region.shape[1] < w:
+                    continue
+            
+            result = cv2.matchTemplate(region, scaled, cv2.TM_CCOEFF_NORMED)
+            _, score, _, loc = cv2.minMaxLoc(result)
+            if score > best_score:
+                best_score = score
+                best_center = (x0 + loc[0] + w // 2, y0 + loc[1] + h // 2)
+            if best_score >= self.EARLY_EXIT_SCORE:
+                break
+        
+        return best_score, best_center
+    
+    def _match_at_last_position(self, element_name, frame, template):
+        """Cheaply check whether an element is still where it was last seen.
+        
+        The window at the last known position is compared to the template by
+        dHash Hamming distance; only a close hash is confirmed with
+        matchTemplate over a small padded region.
+        
+        Args:
+            element_name: Name of the element
+            frame: BGR ndarray of the screen
+            template: BGR ndarray of the element
+            
+        Returns:
+            Tuple of (score, (x, y) center or None)
+        """
+        position = self._last_seen.get(element_name)
+        if position is None:
+            coords = self.elements_cache[element_name].get('coords')
+            if not coords:
+                return -1.0, None
+            position = (coords['left'], coords['top'])
+        
+        left, top = position
+        h, w = template.shape[:2]
+        window = frame[top:top + h, left:left + w]
+        if left < 0 or top < 0 or window.shape[:2] != (h, w):
+            return -1.0, None
+        
+        distance = bin(_dhash64(window) ^ self._template_hashes[element_name]).count("1")
+        if distance > self.DHASH_MAX_DISTANCE:
+            return -1.0, None
+        
+        pad = self.LAST_POSITION_PAD
+        x0, y0 = max(left - pad, 0), max(top - pad, 0)
+        region = frame[y0:top + h + pad, x0:left + w + pad]
+        result = cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, loc = cv2.minMaxLoc(result)
+        return score, (x0 + loc[0] + w // 2, y0 + loc[1] + h // 2)
+    
+    def find_element_on_screen(self, element_name, screenshot_np=None, confidence=0.8):
         """Find a previously saved element on current screen.
         
         Args:
             element_name: Name of the element to find
+            screenshot_np: Current screen as a BGR ndarray (captured if omitted)
             confidence: Matching confidence (0.0-1.0)
             
         Returns:
@@ -184,23 +655,27 @@ Be as precise as possible."""
             print(f"Element '{element_name}' not in cache")
             return None
         
-        element_info = self.elements_cache[element_name]
-        filepath = element_info['filepath']
-        
-        if not os.path.exists(filepath):
-            print(f"Element image not found: {filepath}")
+        template = self._get_template(element_name)
+        if template is None:
             return None
         
         print(f"Searching for '{element_name}' on screen...")
         
         try:
-            # Use PyAutoGUI to find the element
-            location = pyautogui.locateOnScreen(filepath, confidence=confidence)
+            if screenshot_np is None:
+                screenshot_np = _to_bgr(pyautogui.screenshot())
             
-            if location:
-                center = pyautogui.center(location)
-                print(f"✓ Found '{element_name}' at ({center.x}, {center.y})")
-                return (center.x, center.y)
+            score, center = self._match_at_last_position(
+                element_name, screenshot_np, template
+            )
+            if score < confidence:
+                score, center = self._match_multiscale(screenshot_np, template)
+            
+            if center and score >= confidence:
+                print(f"✓ Found '{element_name}' at {center} (score {score:.2f})")
+                h, w = template.shape[:2]
+                self._last_seen[element_name] = (center[0] - w // 2, center[1] - h // 2)
+                return center
             else:
                 print(f"✗ Element '{element_name}' not found on screen")
                 return None
@@ -209,6 +684,65 @@ Be as precise as possible."""
             print(f"Error locating element: {e}")
             return None
     
+    def a11y_resolve(self, element_description):
+        """Locate a common control (e.g. "close button") via the accessibility API.
+        
+        Args:
+            element_description: Description of element to find
+            
+        Returns:
+            Tuple of (x, y) screen coordinates, or None if not resolvable this way
+        """
+        coords = accessibility.resolve(element_description)
+        if coords:
+            print(f"✓ Found '{element_description}' via accessibility API at {coords}")
+        return coords
+    
+    def learn_element(self, screenshot, base64_image, element_description):
+        """Locate an element with AI and save it as a template for future lookups.
+        
+        A recent AI answer for the same screen and description is reused
+        instead of asking the model again.
+        
+        Args:
+            screenshot: PIL Image of screen
+            base64_image: Base64 encoded screenshot
+            element_description: Description of element to find
+            
+        Returns:
+            Tuple of (x, y) coordinates of element center, or None if not found
+        """
+        # Reuse a recent AI answer for the same screen and description
+        key = (_phash(screenshot), element_description.lower().strip())
+        coord_dict = self._ai_cache.get(key)
+        if coord_dict:
+            print("Using cached AI location for identical screen")
+            self._ai_cache.move_to_end(key)
+            cropped = None
+        else:
+            # If not found, extract it from the current screen
+            print(f"Element not in cache, extracting from screen...")
+            cropped, coord_dict = self.extract_element_from_description(
+                screenshot, base64_image, element_description
+            )
+            if coord_dict:
+                self._ai_cache[key] = coord_dict
+                if len(self._ai_cache) > self.AI_CACHE_SIZE:
+                    self._ai_cache.popitem(last=False)
+        
+        if not coord_dict:
+            return None
+        
+        # Save the element for future use
+        if cropped:
+            self.save_element(element_description, cropped, coord_dict)
+        
+        # Center of detected region
+        return (
+            coord_dict['left'] + coord_dict['width'] // 2,
+            coord_dict['top'] + coord_dict['height'] // 2
+        )
+    
     def learn_and_click(self, screenshot, base64_image, element_description):
         """Learn about an element and click it in one operation.
         
@@ -224,34 +758,95 @@ Be as precise as possible."""
         print(f"Learning and clicking: {element_description}")
         print('='*60)
         
-        # First, try to find it if we already know about it
-        coords = self.find_element_on_screen(element_description)
+        # Common controls can be resolved without any image work
+        coords = self.a11y_resolve(element_description)
         if coords:
             pyautogui.click(coords[0], coords[1])
             return True, coords
         
-        # If not found, extract it from the current screen
-        print(f"Element not in cache, extracting from screen...")
-        cropped, coord_dict = self.extract_element_from_description(
-            screenshot, base64_image, element_description
-        )
+        # Next, try to find it if we already know about it
+        coords = self.find_element_on_screen(element_description, _to_bgr(screenshot))
+        if coords:
+            pyautogui.click(coords[0], coords[1])
+            return True, coords
         
-        if cropped and coord_dict:
-            # Save the element for future use
-            self.save_element(element_description, cropped, coord_dict)
-            
-            # Click at the center of detected region
-            click_x = coord_dict['left'] + coord_dict['width'] // 2
-            click_y = coord_dict['top'] + coord_dict['height'] // 2
-            
-            print(f"Clicking at ({click_x}, {click_y})")
-            pyautogui.click(click_x, click_y)
-            
-            return True, (click_x, click_y)
+        coords = self.learn_element(screenshot, base64_image, element_description)
+        if coords:
+            print(f"Clicking at ({coords[0]}, {coords[1]})")
+            pyautogui.click(coords[0], coords[1])
+            return True, coords
         
         print(f"✗ Could not locate '{element_description}'")
         return False, None
     
+    def locate_many(self, screenshot, base64_image, element_descriptions):
+        """Locate several elements, batching every cache miss into one AI request.
+        
+        Elements already learned are found by template matching; the rest are
+        extracted with a single call to extract_multiple and saved for reuse.
+        
+        Args:
+            screenshot: PIL Image of screen
+            base64_image: Base64 encoded screenshot
+            element_descriptions: List of element descriptions
+            
+        Returns:
+            Dict mapping each found description to its (x, y) center
+        """
+        located, misses = self._locate_cached(screenshot, element_descriptions)
+        if misses:
+            print(f"Extracting {len(misses)} element(s) with one AI request...")
+            extracted = self.extract_multiple(screenshot, base64_image, misses)
+            self._store_extracted(extracted, located)
+        return located
+    
+    async def locate_many_async(self, screenshot, base64_image, element_descriptions):
+        """Like locate_many, but extracts each cache miss with a concurrent AI request.
+        
+        Args:
+            screenshot: PIL Image of screen
+            base64_image: Base64 encoded screenshot
+            element_descriptions: List of element descriptions
+            
+        Returns:
+            Dict mapping each found description to its (x, y) center
+        """
+        located, misses = self._locate_cached(screenshot, element_descriptions)
+        if misses:
+            print(f"Extracting {len(misses)} element(s) with concurrent AI requests...")
+            extracted = await self.extract_many_async(screenshot, base64_image, misses)
+            self._store_extracted(extracted, located)
+        return located
+    
+    def _locate_cached(self, screenshot, element_descriptions):
+        """Resolve elements via the accessibility API or template matching.
+        
+        Returns:
+            Tuple of (dict of description -> (x, y) center, list of unresolved descriptions)
+        """
+        frame = _to_bgr(screenshot)
+        located = {}
+        misses = []
+        for description in element_descriptions:
+            coords = self.a11y_resolve(description) or self.find_element_on_screen(
+                description, frame
+            )
+            if coords:
+                located[description] = coords
+            elif description not in misses:
+                misses.append(description)
+        return located, misses
+    
+    def _store_extracted(self, extracted, located):
+        """Save AI-extracted elements and record their centers in located."""
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        for description, (cropped, coord_dict) in extracted.items():
+            self.save_element(description, cropped, coord_dict, timestamp=timestamp)
+            located[description] = (
+                coord_dict['left'] + coord_dict['width'] // 2,
+                coord_dict['top'] + coord_dict['height'] // 2
+            )
+    
     def list_known_elements(self):
         """List all cached elements.
         
@@ -263,6 +858,10 @@ Be as precise as possible."""
     def clear_cache(self):
         """Clear all cached elements."""
         self.elements_cache = {}
+        self._templates.clear()
+        self._template_hashes.clear()
+        self._last_seen.clear()
+        self._ai_cache.clear()
         self._save_cache()
         print("Element cache cleared")
 
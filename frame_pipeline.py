@@ -0,0 +1,51 @@
+"""Fused capture, downscale and encode loop for streaming screenshots to the vision model."""
+import cv2
+import numpy as np
+
+
+class FramePipeline:
+    """Produces encoded screenshots without allocating new frame buffers each tick.
+    
+    Captures are written into a small ring of preallocated buffers, as are
+    their downscaled copies, so a frame returned by tick() stays valid until
+    the ring wraps around: with the default two slots, the previous frame can
+    still be used while the next one is captured.
+    """
+    
+    def __init__(self, screen_capture, slots=2):
+        """Initialize the pipeline.
+        
+        Args:
+            screen_capture: ScreenCapture providing capture and encoding settings
+            slots: Number of frames kept alive in the buffer ring
+        """
+        self.screen_capture = screen_capture
+        self._frames = [None] * slots
+        self._scaled = [None] * slots
+        self.frame_count = 0
+    
+    def tick(self):
+        """Capture, downscale and encode the next frame.
+        
+        The encoded image can be passed straight to VisionAnalyzer, which
+        base64-encodes it once while building the request.
+        
+        Returns:
+            Tuple of (BGR ndarray at capture resolution, memoryview of the encoded image)
+        """
+        slot = self.frame_count % len(self._frames)
+        self.frame_count += 1
+        
+        frame = self.screen_capture.take_screenshot_ndarray(out=self._frames[slot])
+        self._frames[slot] = frame
+        
+        height, width = frame.shape[:2]
+        size = self.screen_capture.model_size(width, height)
+        scaled = frame
+        if size != (width, height):
+            scaled = self._scaled[slot]
+            if scaled is None or scaled.shape[:2] != (size[1], size[0]):
+                scaled = self._scaled[slot] = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            cv2.resize(frame, size, dst=scaled, interpolation=cv2.INTER_AREA)
+        
+        return frame, self.screen_capture.encode_image(scaled)
@@ -1,61 +1,339 @@
 """Screenshot capture module for computer use agent."""
-import pyautogui
+import mss
 from PIL import Image
-import base64
+import cv2
+import numpy as np
+import concurrent.futures
+import itertools
+import threading
+import zlib
 from io import BytesIO
 from datetime import datetime
 import os
+import sys
+from base64_codec import b64encode
 
 
 class ScreenCapture:
     """Handles screenshot capture and encoding."""
     
-    def __init__(self, save_screenshots=True, screenshots_dir="screenshots"):
+    MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+    
+    # On-disk screenshot format -> file extension (WebP is saved losslessly)
+    DISK_EXTENSIONS = {"WEBP": ".webp", "PNG": ".png"}
+    
+    # zlib level for PNG output: level 1 is several times faster than PIL's
+    # default of 6 for output only slightly larger
+    PNG_COMPRESS_LEVEL = 1
+    
+    # mss monitor to capture, matching what pyautogui.screenshot() covers so
+    # pixel positions are pyautogui click coordinates: the whole X11 root
+    # window on Linux (monitor 1 need not sit at the origin there), and the
+    # primary display, whose top-left is always (0, 0), elsewhere
+    MONITOR_INDEX = 0 if sys.platform.startswith("linux") else 1
+    
+    # Edge length in pixels of the tiles hashed to detect screen changes
+    TILE_SIZE = 256
+    
+    def __init__(self, save_screenshots=True, screenshots_dir="screenshots", jpeg_quality=85,
+                 max_image_side=2048, max_short_side=768, image_format="JPEG", webp_quality=80,
+                 webp_lossless=False, disk_format="WEBP", grayscale=False):
         """Initialize screenshot capture.
         
         Args:
             save_screenshots: Whether to save screenshots to disk
             screenshots_dir: Directory to save screenshots
+            jpeg_quality: JPEG quality (0-100) used when encoding for the vision model
+            max_image_side: Longest edge in pixels of images encoded for the vision
+                model; larger captures are downscaled (None to disable)
+            max_short_side: Shortest edge in pixels of images encoded for the vision
+                model (None to disable). The defaults match the size the API
+                itself resizes high-detail images to, so nothing the model would
+                see is lost, while small UI text becomes harder to read below it
+            image_format: Default encoding for the vision model ("JPEG", "WEBP" or "PNG")
+            webp_quality: WebP quality (1-100) used when image_format is "WEBP"
+            webp_lossless: Encode WebP losslessly instead, which keeps small UI text
+                crisp (no chroma subsampling) and is still far smaller than PNG
+            disk_format: Format of saved screenshots ("WEBP" for lossless WebP, which
+                encodes faster and far smaller than PNG, or "PNG")
+            grayscale: Encode images for the vision model in grayscale, a third of
+                the pixel data, for tasks that only need layout and text
         """
+        if image_format.upper() not in self.MIME_TYPES:
+            raise ValueError(f"Unsupported image format: {image_format}")
+        if disk_format.upper() not in self.DISK_EXTENSIONS:
+            raise ValueError(f"Unsupported disk format: {disk_format}")
+        
         self.save_screenshots = save_screenshots
         self.screenshots_dir = screenshots_dir
+        self.jpeg_quality = jpeg_quality
+        self.max_image_side = max_image_side
+        self.max_short_side = max_short_side
+        self.image_format = image_format.upper()
+        self.webp_quality = webp_quality
+        self.webp_lossless = webp_lossless
+        self.disk_format = disk_format.upper()
+        self.grayscale = grayscale
         
         if save_screenshots and not os.path.exists(screenshots_dir):
             os.makedirs(screenshots_dir)
+        
+        # Screenshots are written to disk in the background, in capture order
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        
+        # Default filenames: session start time plus a per-session sequence number
+        self._filename_prefix = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._filename_counter = itertools.count()
+        
+        # One persistent mss handle per thread (handles are not thread-safe)
+        self._local = threading.local()
+        
+        # Tile hashes and encoding of the last frame seen by encode_changed
+        self._prev_hashes = None
+        self._prev_base64 = None
+        self._diff_lock = threading.Lock()
+        self.dirty_tiles = []
+    
+    def _grab(self):
+        """Grab the primary monitor with this thread's persistent mss handle."""
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+            self._local.monitor = sct.monitors[self.MONITOR_INDEX]
+        return sct.grab(self._local.monitor)
+    
+    @property
+    def mime_type(self):
+        """MIME type of images produced by encode_image_to_base64 by default."""
+        return self.MIME_TYPES[self.image_format]
+    
+    @property
+    def disk_extension(self):
+        """File extension of screenshots saved with the default disk format."""
+        return self.DISK_EXTENSIONS[self.disk_format]
     
     def take_screenshot(self, filename=None):
         """Take a screenshot and optionally save it.
         
+        Saving happens on a background thread, so the image is returned
+        before it is written; call flush() to wait for pending saves.
+        
         Args:
             filename: Optional filename for the screenshot
             
         Returns:
             PIL Image object
         """
-        screenshot = pyautogui.screenshot()
+        raw = self._grab()
+        # Single C pass from mss's BGRA buffer into the RGB image. Aliasing the
+        # buffer with frombuffer is only possible when the raw mode equals the
+        # image mode, and BGRX is not an image mode; mss's own .rgb property
+        # would add a slower Python-level conversion instead.
+        screenshot = Image.frombytes("RGB", raw.size, raw.bgra, "raw", "BGRX")
         
         if self.save_screenshots:
-            if filename is None:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"screenshot_{timestamp}.png"
-            
-            filepath = os.path.join(self.screenshots_dir, filename)
-            screenshot.save(filepath)
-            print(f"Screenshot saved to {filepath}")
+            self.save_screenshot(screenshot, filename)
         
         return screenshot
     
-    def encode_image_to_base64(self, image):
+    def save_screenshot(self, screenshot, filename=None):
+        """Queue a screenshot to be written to screenshots_dir in the background.
+        
+        Args:
+            screenshot: PIL Image object (must not be modified afterwards)
+            filename: Optional filename for the screenshot
+        """
+        if filename is None:
+            filename = (f"screenshot_{self._filename_prefix}_"
+                        f"{next(self._filename_counter):06d}{self.disk_extension}")
+        
+        filepath = os.path.join(self.screenshots_dir, filename)
+        self._io_pool.submit(self._write_screenshot, screenshot, filepath)
+    
+    def _write_screenshot(self, screenshot, filepath):
+        """Write a screenshot to disk, in the format given by its extension."""
+        try:
+            if filepath.lower().endswith(".webp"):
+                screenshot.save(filepath, lossless=True, method=0)
+            elif filepath.lower().endswith(".png"):
+                screenshot.save(filepath, compress_level=self.PNG_COMPRESS_LEVEL)
+            else:
+                screenshot.save(filepath)
+            print(f"Screenshot saved to {filepath}")
+        except Exception as e:
+            print(f"✗ Failed to save screenshot {filepath}: {e}")
+    
+    def flush(self):
+        """Block until all queued screenshots have been written to disk."""
+        self._io_pool.submit(lambda: None).result()
+    
+    def close(self):
+        """Write any queued screenshots and stop the background writer."""
+        self._io_pool.shutdown(wait=True)
+    
+    def take_screenshot_ndarray(self, out=None):
+        """Take a screenshot as a BGR ndarray without building a PIL Image.
+        
+        The capture is not saved to disk.
+        
+        Args:
+            out: Optional uint8 array of shape (height, width, 3) to write the
+                frame into; ignored if its shape does not match the screen
+        
+        Returns:
+            numpy.ndarray of shape (height, width, 3), BGR channel order
+        """
+        raw = np.asarray(self._grab())
+        if out is None or out.shape != raw.shape[:2] + (3,):
+            return cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR)
+        return cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR, dst=out)
+    
+    def ndarray_to_image(self, frame):
+        """Convert a BGR ndarray from take_screenshot_ndarray to a PIL Image."""
+        return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    
+    def model_size(self, width, height):
+        """Size (width, height) a capture is downscaled to for the vision model."""
+        scale = 1.0
+        if self.max_image_side:
+            scale = min(scale, self.max_image_side / max(width, height))
+        if self.max_short_side:
+            scale = min(scale, self.max_short_side / min(width, height))
+        if scale >= 1.0:
+            return width, height
+        return round(width * scale), round(height * scale)
+    
+    def _fit_for_model(self, frame):
+        """Downscale a BGR frame to fit max_image_side and max_short_side."""
+        height, width = frame.shape[:2]
+        size = self.model_size(width, height)
+        if size == (width, height):
+            return frame
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    
+    def encode_image_to_base64(self, image, format=None):
         """Encode PIL Image to base64 string.
         
         Args:
-            image: PIL Image object
+            image: PIL Image object, or BGR ndarray from take_screenshot_ndarray
+            format: "JPEG", "WEBP" or "PNG" (defaults to image_format)
             
         Returns:
             Base64 encoded string
         """
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")
-        img_bytes = buffered.getvalue()
-        return base64.b64encode(img_bytes).decode('utf-8')
-
+        return b64encode(self.encode_image(image, format))
+    
+    def encode_image(self, image, format=None):
+        """Encode an image for the vision model without base64-encoding it.
+        
+        JPEG and WebP go through OpenCV's encoders, which are an order of
+        magnitude faster than PIL's PNG path on full-screen captures, after
+        downscaling to the model's input size. The model reports locations as
+        percentages, so the smaller image needs no coordinate changes. Pass
+        format="PNG" when a full-resolution lossless encoding is required.
+        
+        Args:
+            image: PIL Image object, or BGR ndarray from take_screenshot_ndarray
+            format: "JPEG", "WEBP" or "PNG" (defaults to image_format)
+            
+        Returns:
+            memoryview of the encoded image bytes
+        """
+        format = (format or self.image_format).upper()
+        
+        if format == "PNG":
+            if isinstance(image, np.ndarray):
+                image = self.ndarray_to_image(image)
+            if self.grayscale:
+                image = image.convert("L")
+            buffered = BytesIO()
+            image.save(buffered, format="PNG", compress_level=self.PNG_COMPRESS_LEVEL)
+            return buffered.getbuffer()
+        
+        if isinstance(image, np.ndarray):
+            frame = image
+        elif self.grayscale:
+            frame = np.asarray(image.convert("L"))
+        else:
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            frame = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+        frame = self._fit_for_model(frame)
+        if self.grayscale and frame.ndim == 3:
+            # Convert after downscaling, on the smaller frame
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        
+        if format == "WEBP":
+            # OpenCV treats a WebP quality above 100 as lossless
+            quality = 101 if self.webp_lossless else self.webp_quality
+            ok, buf = cv2.imencode(".webp", frame, [int(cv2.IMWRITE_WEBP_QUALITY), quality])
+        else:
+            ok, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            raise RuntimeError(f"Failed to {format}-encode screenshot")
+        return memoryview(buf)
+    
+    def _tile_hashes(self, frame):
+        """CRC32 of each TILE_SIZE x TILE_SIZE tile of a frame, as a (rows, cols) array."""
+        height, width = frame.shape[:2]
+        size = self.TILE_SIZE
+        rows, cols = -(-height // size), -(-width // size)
+        hashes = np.empty((rows, cols), dtype=np.uint32)
+        for row in range(rows):
+            band = frame[row * size:(row + 1) * size]
+            for col in range(cols):
+                tile = band[:, col * size:(col + 1) * size]
+                hashes[row, col] = zlib.crc32(np.ascontiguousarray(tile))
+        return hashes
+    
+    def encode_changed(self, image):
+        """Encode an image with the default settings unless the screen is unchanged.
+        
+        The frame is hashed in TILE_SIZE tiles and compared with the previous
+        frame passed here; when no tile differs, the previous encoding is
+        returned without running the encoder again. The changed tiles are
+        recorded in dirty_tiles as (left, top, width, height) rectangles.
+        
+        Args:
+            image: PIL Image object, or BGR ndarray from take_screenshot_ndarray
+            
+        Returns:
+            Base64 encoded string
+        """
+        frame = image if isinstance(image, np.ndarray) else np.asarray(image)
+        hashes = self._tile_hashes(frame)
+        
+        with self._diff_lock:
+            prev_hashes, prev_base64 = self._prev_hashes, self._prev_base64
+        if prev_base64 is not None and prev_hashes.shape == hashes.shape:
+            changed = np.argwhere(prev_hashes != hashes)
+        else:
+            changed = np.argwhere(np.ones(hashes.shape, dtype=bool))
+        
+        height, width = frame.shape[:2]
+        size = self.TILE_SIZE
+        dirty_tiles = [
+            (col * size, row * size,
+             min(size, width - col * size), min(size, height - row * size))
+            for row, col in changed.tolist()
+        ]
+        
+        base64_image = prev_base64 if not dirty_tiles else self.encode_image_to_base64(image)
+        with self._diff_lock:
+            self._prev_hashes, self._prev_base64 = hashes, base64_image
+            self.dirty_tiles = dirty_tiles
+        return base64_image
+    
+    def capture_and_encode(self, filename=None):
+        """Take a screenshot and encode it for the vision model in one step.
+        
+        An unchanged screen reuses the previous encoding (see encode_changed).
+        
+        Args:
+            filename: Optional filename for the screenshot
+            
+        Returns:
+            Tuple of (PIL Image, base64 encoded image string)
+        """
+        screenshot = self.take_screenshot(filename=filename)
+        return screenshot, self.encode_changed(screenshot)
@@ -1,59 +1,158 @@
 """Vision analysis module using OpenAI GPT-5 mini."""
-from openai import OpenAI
+import asyncio
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+from base64_codec import b64encode
+
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    # httpx only speaks HTTP/2 with the optional h2 package installed
+    _HTTP2 = False
+
+
+_DEFAULT_PROMPT = """Describe what you see on this screen in detail.
+Include:
+- Main elements and UI components
+- Text content visible
+- Interactive elements (buttons, links, forms)
+- Current state of the application/window
+- Any notable features or areas of interest"""
+
+# Everything before {context} must stay identical across calls: the API caches
+# prompt prefixes, so per-call text (the goal, the history note) goes last.
+_ACTION_PROMPT = """Analyze the current screen and suggest the next action to take toward the goal below.
+Provide a specific action in this format:
+ACTION: [click/type/scroll/move/wait]
+TARGET: [description of where to click or what to type]
+REASON: [why this action helps achieve the goal]
+
+Be specific about coordinates or text to type.
+
+{context}Goal: {goal}"""
+
+_HISTORY_NOTE = ("The {count} screenshots show the screen over the last few steps, "
+                 "oldest first; the last one is the current screen.\n")
 
 
 class VisionAnalyzer:
     """Analyzes screenshots using OpenAI's GPT-5 mini vision model."""
     
-    def __init__(self, api_key):
+    # Most images sent in one request; older frames beyond this are dropped
+    MAX_IMAGES_PER_REQUEST = 8
+    
+    # Connection pool shared by all requests from one client
+    HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8, max_connections=16)
+    HTTP_TIMEOUT = 60.0
+    
+    def __init__(self, api_key, image_mime_type="image/jpeg"):
         """Initialize the vision analyzer.
         
         Args:
             api_key: OpenAI API key
+            image_mime_type: MIME type of the base64 images that will be sent
         """
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
+        
+        # Persistent pooled connections (HTTP/2 when available) so requests
+        # reuse TLS sessions instead of handshaking each time
+        self._http = DefaultHttpxClient(
+            http2=_HTTP2, limits=self.HTTP_LIMITS, timeout=self.HTTP_TIMEOUT
+        )
+        self.client = OpenAI(api_key=api_key, http_client=self._http)
         self.model = "gpt-5-mini"
+        self.image_mime_type = image_mime_type
+        
+        # Async client, bound to the event loop it was created on
+        self._aclient = None
+        self._aclient_loop = None
     
-    def analyze_screenshot(self, base64_image, prompt=None):
+    def analyze_screenshot(self, base64_image, prompt=None, response_format=None, on_token=None):
         """Analyze a screenshot using GPT-5 mini vision model.
         
         Args:
-            base64_image: Base64 encoded image string
+            base64_image: Base64 encoded image string, or the encoded image bytes
+                (e.g. from ScreenCapture.encode_image), which are base64-encoded
+                once while building the request
             prompt: Custom prompt for the analysis (optional)
+            response_format: OpenAI response_format for structured output (optional)
+            on_token: Callable receiving each text fragment as it is generated;
+                when given, the response is streamed (optional)
             
         Returns:
             String containing the model's analysis
         """
-        if prompt is None:
-            prompt = """Describe what you see on this screen in detail. 
-            Include:
-            - Main elements and UI components
-            - Text content visible
-            - Interactive elements (buttons, links, forms)
-            - Current state of the application/window
-            - Any notable features or areas of interest"""
+        return self._complete(
+            self._build_request(base64_image, prompt, response_format), on_token
+        )
+    
+    def analyze_screenshots_batch(self, base64_images, prompt, on_token=None):
+        """Analyze several screenshots in a single request.
+        
+        The images are sent after the prompt in the order given, so one call
+        (and one prompt prefill) covers a whole sequence of frames.
+        
+        Args:
+            base64_images: List of base64 encoded image strings (or encoded image
+                bytes), oldest first;
+                only the last MAX_IMAGES_PER_REQUEST are sent
+            prompt: Prompt for the analysis
+            on_token: Callable receiving streamed text fragments (optional)
+            
+        Returns:
+            String containing the model's analysis
+        """
+        images = list(base64_images)[-self.MAX_IMAGES_PER_REQUEST:]
+        return self._complete(self._build_request(images, prompt), on_token)
+    
+    def _complete(self, request, on_token=None):
+        """Run a chat completion, streaming fragments to on_token when given."""
+        try:
+            if on_token is None:
+                response = self.client.chat.completions.create(**request)
+                return response.choices[0].message.content
+            
+            parts = []
+            for chunk in self.client.chat.completions.create(stream=True, **request):
+                if not chunk.choices:
+                    continue
+                token = chunk.choices[0].delta.content
+                if token:
+                    parts.append(token)
+                    on_token(token)
+            return "".join(parts)
+        
+        except Exception as e:
+            message = f"Error analyzing screenshot: {str(e)}"
+            if on_token is not None:
+                on_token(message)
+            return message
+    
+    async def analyze_screenshot_async(self, base64_image, prompt=None, response_format=None):
+        """Async version of analyze_screenshot for issuing requests concurrently.
+        
+        Args:
+            base64_image: Base64 encoded image string, or the encoded image bytes
+            prompt: Custom prompt for the analysis (optional)
+            response_format: OpenAI response_format for structured output (optional)
+            
+        Returns:
+            String containing the model's analysis
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient = AsyncOpenAI(
+                api_key=self.api_key,
+                http_client=DefaultAsyncHttpxClient(
+                    http2=_HTTP2, limits=self.HTTP_LIMITS, timeout=self.HTTP_TIMEOUT
+                ),
+            )
+            self._aclient_loop = loop
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1000
+            response = await self._aclient.chat.completions.create(
+                **self._build_request(base64_image, prompt, response_format)
             )
             
             return response.choices[0].message.content
@@ -61,25 +160,74 @@ class VisionAnalyzer:
         except Exception as e:
             return f"Error analyzing screenshot: {str(e)}"
     
-    def analyze_and_suggest_action(self, base64_image, goal):
+    def close(self):
+        """Release pooled connections of the sync client."""
+        self._http.close()
+    
+    async def aclose(self):
+        """Release pooled connections of the async client on the running loop."""
+        if self._aclient is not None and self._aclient_loop is asyncio.get_running_loop():
+            await self._aclient.close()
+        self._aclient = None
+        self._aclient_loop = None
+    
+    def _build_request(self, base64_image, prompt, response_format=None):
+        """Build chat completion arguments for one image or a list of images."""
+        if prompt is None:
+            prompt = _DEFAULT_PROMPT
+        
+        images = base64_image if isinstance(base64_image, list) else [base64_image]
+        content = [{"type": "text", "text": prompt}]
+        for image in images:
+            if not isinstance(image, str):
+                # Raw encoded image bytes: base64 them once, here
+                image = b64encode(image)
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{self.image_mime_type};base64,{image}"
+                }
+            })
+        
+        request = {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content
+                }
+            ],
+            "max_tokens": 1000
+        }
+        if response_format is not None:
+            request["response_format"] = response_format
+        return request
+    
+    def analyze_and_suggest_action(self, base64_image, goal, on_token=None, history=None):
         """Analyze screenshot and suggest next action based on a goal.
         
         Args:
             base64_image: Base64 encoded image string
             goal: The goal or task to accomplish
+            on_token: Callable receiving streamed text fragments (optional)
+            history: Base64 images of earlier screens, oldest first, sent in the
+                same request so the model can see how the screen has changed
             
         Returns:
             String containing suggested action
         """
-        prompt = f"""Goal: {goal}
-
-Analyze this screenshot and suggest the next action to take.
-Provide a specific action in this format:
-ACTION: [click/type/scroll/move/wait]
-TARGET: [description of where to click or what to type]
-REASON: [why this action helps achieve the goal]
-
-Be specific about coordinates or text to type."""
+        # An unchanged screen reuses its encoding; don't send it twice
+        history = list(history or ())
+        while history and history[-1] == base64_image:
+            history.pop()
+        
+        if history:
+            frames = (history + [base64_image])[-self.MAX_IMAGES_PER_REQUEST:]
+            context = _HISTORY_NOTE.format(count=len(frames))
+        else:
+            frames = base64_image
+            context = ""
         
-        return self.analyze_screenshot(base64_image, prompt)
+        prompt = _ACTION_PROMPT.format(context=context, goal=goal)
+        return self._complete(self._build_request(frames, prompt), on_token)
 